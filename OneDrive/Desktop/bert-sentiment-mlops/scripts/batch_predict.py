@@ -4,26 +4,71 @@ Usage:
 """
 import argparse
 import os
+import numpy as np
 import pandas as pd
-from transformers import pipeline
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
 
-def main(input_file, output_file, model_path="model_output"):
+def load_model(model_path):
+    # use_fast=True: Rust tokenizer that encodes the whole list of texts in one call
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+    return tokenizer, model
+
+
+def predict_texts(texts, tokenizer, model, batch_size=32, max_length=256, bf16=False):
+    labels = [None] * len(texts)
+    scores = [0.0] * len(texts)
+    if not texts:
+        return labels, scores
+
+    # Tokenize once without padding, then batch in length order so each batch
+    # is only padded to its own longest text instead of the global outliers
+    encodings = tokenizer(texts, truncation=True, max_length=max_length)
+    order = np.argsort([len(ids) for ids in encodings["input_ids"]], kind="stable")
+
+    with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=bf16):
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = tokenizer.pad(
+                {key: [encodings[key][i] for i in idx] for key in encodings.keys()},
+                padding="longest",
+                return_tensors="pt",
+            )
+            probs = model(**batch).logits.float().softmax(-1)
+            batch_scores, batch_ids = probs.max(-1)
+            for i, label_id, score in zip(idx, batch_ids.tolist(), batch_scores.tolist()):
+                labels[i] = model.config.id2label[label_id]
+                scores[i] = score
+
+    return labels, scores
+
+
+def main(input_file, output_file, model_path="model_output", batch_size=32, bf16=False, chunksize=4096):
     os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
     if not os.path.exists(input_file):
         raise FileNotFoundError(input_file)
 
-    df = pd.read_csv(input_file)
-    if "text" not in df.columns:
+    columns = list(pd.read_csv(input_file, nrows=0).columns)
+    if "text" not in columns:
         raise ValueError("Input CSV must contain a 'text' column")
 
-    sentiment = pipeline("sentiment-analysis", model=model_path, tokenizer=model_path)
-    preds = sentiment(list(df["text"].fillna("")))
+    tokenizer, model = load_model(model_path)
 
-    df["predicted_sentiment"] = [p["label"] for p in preds]
-    df["confidence"] = [float(p["score"]) for p in preds]
-    df.to_csv(output_file, index=False)
-    print(f"Wrote predictions to {output_file}")
+    # Stream the input in chunks and append predictions as we go, so memory stays O(chunksize)
+    rows = 0
+    with open(output_file, "w", newline="") as f:
+        pd.DataFrame(columns=columns + ["predicted_sentiment", "confidence"]).to_csv(f, index=False)
+        for chunk in pd.read_csv(input_file, chunksize=chunksize):
+            labels, scores = predict_texts(
+                chunk["text"].fillna("").tolist(), tokenizer, model, batch_size=batch_size, bf16=bf16
+            )
+            chunk["predicted_sentiment"] = labels
+            chunk["confidence"] = scores
+            chunk.to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    print(f"Wrote {rows} predictions to {output_file}")
 
 
 if __name__ == "__main__":
@@ -31,5 +76,15 @@ if __name__ == "__main__":
     parser.add_argument("--input", required=True)
     parser.add_argument("--output", required=True)
     parser.add_argument("--model-path", default="model_output")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--bf16", action="store_true", help="Run under BF16 autocast (CPUs with AVX-512 BF16/AMX)")
+    parser.add_argument("--chunksize", type=int, default=4096)
     args = parser.parse_args()
-    main(args.input, args.output, model_path=args.model_path)
+    main(
+        args.input,
+        args.output,
+        model_path=args.model_path,
+        batch_size=args.batch_size,
+        bf16=args.bf16,
+        chunksize=args.chunksize,
+    )
@@ -0,0 +1,31 @@
+"""Export the fine-tuned model in `model_output/` to ONNX and apply INT8 dynamic quantization.
+Writes `model.onnx` and `model_quantized.onnx` next to the tokenizer so the API can serve it with USE_ONNX=1.
+Usage:
+  python scripts/export_onnx.py --model-path model_output
+"""
+import argparse
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+
+def main(model_path="model_output", out_dir=None):
+    out_dir = out_dir or model_path
+
+    ort_model = ORTModelForSequenceClassification.from_pretrained(model_path, export=True)
+    ort_model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(out_dir)
+
+    # Dynamic quantization: INT8 weights, activations quantized on the fly (no calibration data needed)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer = ORTQuantizer.from_pretrained(ort_model)
+    quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+    print(f"Wrote ONNX model and INT8 quantized model to {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-path", default="model_output")
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+    main(model_path=args.model_path, out_dir=args.out_dir)
@@ -1,56 +1,174 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from pydantic import BaseModel
+from collections import OrderedDict
+from hashlib import blake2b
+import asyncio
 import os
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
 
 class PredictRequest(BaseModel):
     text: str
 
 
+ONNX_FILE_NAME = "model_quantized.onnx"
+# Micro-batching: concurrent /predict requests are coalesced into one forward pass
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", "5"))
+MAX_LENGTH = 256
+# Compile the PyTorch model with TorchInductor at startup (requires torch>=2.0)
+TORCH_COMPILE = os.environ.get("TORCH_COMPILE", "1") == "1"
+# In-process LRU of recent predictions keyed by text hash; 0 disables it
+PREDICT_CACHE_SIZE = int(os.environ.get("PREDICT_CACHE_SIZE", "4096"))
+CACHE_MAX_AGE = int(os.environ.get("CACHE_MAX_AGE", "3600"))
+
 app = FastAPI()
-predictor = None
+model = None
+tokenizer = None
+id2label = None
+request_queue = None
+batch_task = None
+prediction_cache = OrderedDict()
 
 
 @app.on_event("startup")
 def load_model():
-    global predictor
+    global model, tokenizer, id2label
     model_path = os.environ.get("MODEL_PATH", "/app/model_output")
-    
+
     # Check if model exists
     if not os.path.exists(model_path) or not os.listdir(model_path):
         print(f"Warning: Model not found at {model_path}. Using default distilbert-base-uncased model.")
         print("To use a fine-tuned model, run: python scripts/preprocess.py && python scripts/train.py")
         model_path = "distilbert-base-uncased"
-    
+
+    use_onnx = os.environ.get("USE_ONNX", "0") == "1"
+    if use_onnx and not os.path.exists(os.path.join(model_path, ONNX_FILE_NAME)):
+        print(f"Warning: {ONNX_FILE_NAME} not found in {model_path}. Falling back to the FP32 PyTorch model.")
+        print("To export the quantized model, run: python scripts/export_onnx.py")
+        use_onnx = False
+
     try:
-        # Use pipeline for simplicity
-        predictor = pipeline("sentiment-analysis", model=model_path, tokenizer=model_path)
-        print(f"Model loaded successfully from {model_path}")
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        if use_onnx:
+            # INT8 dynamically quantized ONNX model served through ONNX Runtime
+            from onnxruntime import ExecutionMode, GraphOptimizationLevel, SessionOptions
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+
+            opts = SessionOptions()
+            opts.graph_optimization_level = GraphOptimizationLevel.ORT_ENABLE_ALL
+            opts.intra_op_num_threads = int(os.environ.get("ORT_THREADS") or max(1, (os.cpu_count() or 2) // 2))
+            opts.inter_op_num_threads = 1
+            opts.execution_mode = ExecutionMode.ORT_SEQUENTIAL
+            opts.enable_mem_pattern = True
+            model = ORTModelForSequenceClassification.from_pretrained(
+                model_path,
+                file_name=ONNX_FILE_NAME,
+                session_options=opts,
+                provider="CPUExecutionProvider",
+            )
+        else:
+            model = AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+        id2label = model.config.id2label
+
+        if not use_onnx and TORCH_COMPILE and hasattr(torch, "compile"):
+            model = torch.compile(model, mode="reduce-overhead", dynamic=True)
+            # Warmup forward so compilation is paid here and not by the first request
+            dummy = torch.ones((1, 16), dtype=torch.long)
+            with torch.inference_mode():
+                model(input_ids=dummy, attention_mask=dummy)
+        print(f"Model loaded successfully from {model_path}" + (f" ({ONNX_FILE_NAME})" if use_onnx else ""))
     except Exception as e:
         print(f"Error loading model: {e}")
         raise
 
 
+@app.on_event("startup")
+async def start_batcher():
+    global request_queue, batch_task
+    request_queue = asyncio.Queue()
+    batch_task = asyncio.create_task(batch_worker())
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if batch_task is not None:
+        batch_task.cancel()
+
+
+def run_batch(texts):
+    """Tokenize and classify a list of texts in a single forward pass."""
+    enc = tokenizer(texts, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="pt")
+    with torch.inference_mode():
+        logits = model(**enc).logits
+    scores, label_ids = logits.softmax(-1).max(-1)
+    return [(id2label[i], s) for i, s in zip(label_ids.tolist(), scores.tolist())]
+
+
+async def batch_worker():
+    """Drain up to MAX_BATCH queued requests (waiting at most MAX_WAIT_MS) and resolve their futures."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await request_queue.get()]
+        deadline = loop.time() + MAX_WAIT_MS / 1000
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(request_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [text for text, _ in batch]
+        try:
+            # Run the forward pass off the event loop so new requests keep queueing meanwhile
+            results = await loop.run_in_executor(None, run_batch, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
 @app.post("/predict")
-def predict(req: PredictRequest):
-    global predictor
-    if predictor is None:
+async def predict(req: PredictRequest, response: Response):
+    if model is None or request_queue is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     text = req.text
     if not isinstance(text, str) or not text.strip():
         raise HTTPException(status_code=400, detail="Input text must be a non-empty string")
+    text = text[:10000]
 
-    res = predictor(text[:10000])
-    if not res:
-        raise HTTPException(status_code=500, detail="Prediction failed")
+    key = blake2b(text.encode(), digest_size=16).digest()
+    response.headers["ETag"] = f'"{key.hex()}"'
+    response.headers["Cache-Control"] = f"max-age={CACHE_MAX_AGE}"
 
-    label = res[0]["label"]
-    score = float(res[0]["score"]) if "score" in res[0] else 0.0
+    # The cache is only touched from the event loop, so no locking is needed
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        prediction_cache.move_to_end(key)
+        label, score = cached
+    else:
+        future = asyncio.get_running_loop().create_future()
+        await request_queue.put((text, future))
+        try:
+            label, score = await future
+        except Exception as e:
+            print(f"Error during prediction: {e}")
+            raise HTTPException(status_code=500, detail="Prediction failed") from e
+        if PREDICT_CACHE_SIZE > 0:
+            prediction_cache[key] = (label, score)
+            if len(prediction_cache) > PREDICT_CACHE_SIZE:
+                prediction_cache.popitem(last=False)
 
-    return {"sentiment": label, "confidence": score}
+    return {"sentiment": label, "confidence": float(score)}
@@ -4,6 +4,15 @@ import streamlit as st
 
 API_URL = os.environ.get("API_URL", "http://api:8000")
 
+
+@st.cache_resource
+def get_session():
+    # One pooled keep-alive session shared across Streamlit reruns
+    session = requests.Session()
+    session.headers["Content-Type"] = "application/json"
+    return session
+
+
 st.set_page_config(page_title="Sentiment Demo")
 st.title("Sentiment Analysis Demo")
 
@@ -13,7 +22,7 @@ if st.button("Analyze"):
         st.error("Please enter some text.")
     else:
         try:
-            resp = requests.post(f"{API_URL}/predict", json={"text": text}, timeout=10)
+            resp = get_session().post(f"{API_URL}/predict", json={"text": text}, timeout=10)
             resp.raise_for_status()
             data = resp.json()
             st.write("**Sentiment:**", data.get("sentiment"))
@@ -0,0 +1,163 @@
+"""Convert the Keras classifier into optimized serving formats.
+
+The output format follows the --output extension: .tflite (INT8 TFLite), .onnx,
+or .xml (OpenVINO IR with FP16-compressed weights).
+
+Usage:
+    python scripts/convert_model.py --model-path models/my_classifier_model.h5 \
+        --output models/my_classifier_model.tflite
+    python scripts/convert_model.py --output models/my_classifier_model.onnx --quantize
+    python scripts/convert_model.py --output models/my_classifier_model.xml
+    TF_USE_LEGACY_KERAS=1 python scripts/convert_model.py --output models/my_classifier_model.tflite \
+        --prune --sparsity 0.5
+
+Set MODEL_PATH to the converted file to serve it from the API.
+"""
+import argparse
+import logging
+import os
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def load_calibration_images(num_samples: int = 200) -> np.ndarray:
+    """Load CIFAR-10 training images, normalized like the API's preprocessing."""
+    (x_train, _), _ = tf.keras.datasets.cifar10.load_data()
+    return (x_train[:num_samples] / 255.0).astype(np.float32)
+
+
+def prune(model, sparsity: float = 0.5, epochs: int = 2, batch_size: int = 128):
+    """Magnitude-prune the model to the target sparsity with a short CIFAR-10 fine-tune.
+
+    tensorflow-model-optimization only wraps Keras 2 models, so the model must come from
+    tf_keras and the script must run with TF_USE_LEGACY_KERAS=1 (see main()).
+    """
+    import tensorflow_model_optimization as tfmot
+
+    (x_train, y_train), _ = tf.keras.datasets.cifar10.load_data()
+    x_train = (x_train / 255.0).astype(np.float32)
+    end_step = int(np.ceil(len(x_train) / batch_size)) * epochs
+
+    schedule = tfmot.sparsity.keras.PolynomialDecay(
+        initial_sparsity=0.0, final_sparsity=sparsity, begin_step=0, end_step=end_step
+    )
+    pruned = tfmot.sparsity.keras.prune_low_magnitude(model, pruning_schedule=schedule)
+    # The classifier ends in a softmax, so the loss takes probabilities
+    pruned.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    pruned.fit(
+        x_train,
+        y_train,
+        batch_size=batch_size,
+        epochs=epochs,
+        callbacks=[tfmot.sparsity.keras.UpdatePruningStep()],
+        verbose=2,
+    )
+    logger.info(f"Pruned model to {sparsity:.0%} weight sparsity")
+    return tfmot.sparsity.keras.strip_pruning(pruned)
+
+
+def to_tflite(model, output_path: str, num_samples: int = 200, sparse: bool = False) -> None:
+    """Convert a Keras model to TFLite with INT8 weights and activations.
+
+    With sparse=True, pruned weights are stored in a sparse format that XNNPACK's
+    sparse kernels can skip at inference time.
+    """
+    calibration_images = load_calibration_images(num_samples)
+
+    def representative_dataset():
+        for image in calibration_images:
+            yield [image[np.newaxis, ...]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if sparse:
+        converter.optimizations.append(tf.lite.Optimize.EXPERIMENTAL_SPARSITY)
+    converter.representative_dataset = representative_dataset
+    tflite_model = converter.convert()
+
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    logger.info(f"Wrote INT8 TFLite model to {output_path} ({len(tflite_model) / 1024:.1f} KB)")
+
+
+def to_onnx(model, output_path: str, quantize: bool = False) -> None:
+    """Convert a Keras model to ONNX, optionally with INT8 dynamic quantization of the weights.
+
+    Exports a traced tf.function rather than using tf2onnx.convert.from_keras, which only
+    understands Keras 2 (tf-keras) models while requirements.txt installs Keras 3.
+    """
+    import tf2onnx
+
+    input_signature = [tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input")]
+    serving_fn = tf.function(lambda x: model(x, training=False), input_signature=input_signature)
+    if not quantize:
+        tf2onnx.convert.from_function(serving_fn, input_signature=input_signature, output_path=output_path)
+        logger.info(f"Wrote ONNX model to {output_path}")
+        return
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp32_path = os.path.join(tmp_dir, "model_fp32.onnx")
+        tf2onnx.convert.from_function(serving_fn, input_signature=input_signature, output_path=fp32_path)
+        quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+    logger.info(f"Wrote INT8 dynamically quantized ONNX model to {output_path}")
+
+
+def to_openvino(model, output_path: str) -> None:
+    """Convert a Keras model to OpenVINO IR (.xml + .bin) via ONNX, compressing weights to FP16."""
+    import openvino as ov
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        onnx_path = os.path.join(tmp_dir, "model.onnx")
+        to_onnx(model, onnx_path)
+        ov.save_model(ov.convert_model(onnx_path), output_path, compress_to_fp16=True)
+    logger.info(f"Wrote OpenVINO IR model to {output_path}")
+
+
+def main(
+    model_path: str,
+    output_path: str,
+    num_samples: int = 200,
+    quantize: bool = False,
+    sparsity: float = None,
+    prune_epochs: int = 2,
+) -> None:
+    if sparsity:
+        # Keras 3 models are rejected by prune_low_magnitude; load the same .h5 through tf-keras
+        import tf_keras
+
+        model = prune(tf_keras.models.load_model(model_path), sparsity=sparsity, epochs=prune_epochs)
+    else:
+        model = tf.keras.models.load_model(model_path)
+    if output_path.endswith(".onnx"):
+        to_onnx(model, output_path, quantize=quantize)
+    elif output_path.endswith(".xml"):
+        to_openvino(model, output_path)
+    else:
+        to_tflite(model, output_path, num_samples=num_samples, sparse=bool(sparsity))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default="models/my_classifier_model.h5")
+    parser.add_argument("--output", default="models/my_classifier_model.tflite")
+    parser.add_argument("--num-samples", type=int, default=200, help="Calibration images for INT8 TFLite quantization")
+    parser.add_argument("--quantize", action="store_true", help="INT8 dynamic quantization for ONNX output")
+    parser.add_argument("--prune", action="store_true", help="Magnitude-prune and fine-tune before converting")
+    parser.add_argument("--sparsity", type=float, default=0.5, help="Target weight sparsity for --prune")
+    parser.add_argument("--prune-epochs", type=int, default=2, help="Fine-tuning epochs for --prune")
+    args = parser.parse_args()
+    main(
+        args.model_path,
+        args.output,
+        num_samples=args.num_samples,
+        quantize=args.quantize,
+        sparsity=args.sparsity if args.prune else None,
+        prune_epochs=args.prune_epochs,
+    )
@@ -2,7 +2,7 @@ from fastapi import FastAPI, UploadFile, File, HTTPException, status
 from pydantic import BaseModel
 from typing import List
 import logging
-from src.model import load_model, preprocess_image, predict_image
+from src.model import load_model, preprocess_image, predict_image, RAW_IMAGE_CONTENT_TYPE
 import os
 
 # Configure basic logging
@@ -71,27 +71,32 @@ async def predict(file: UploadFile = File(..., description="Image file to classi
     """
     Predict the class of an uploaded image.
     
-    - **file**: An image file (PNG, JPEG, etc.)
+    - **file**: An image file (PNG, JPEG, etc.), or raw 32x32x3 uint8 RGB bytes
+      sent as application/octet-stream
     
     Returns:
     - **class_label**: The predicted class name
     - **probabilities**: List of probabilities for each class
     """
     # Basic input validation for content type
-    if not file.content_type or not file.content_type.startswith("image/"):
+    if not file.content_type or not (
+        file.content_type.startswith("image/") or file.content_type == RAW_IMAGE_CONTENT_TYPE
+    ):
         logger.warning(f"Received invalid file type: {file.content_type}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only image files (e.g., JPEG, PNG) are allowed for prediction.",
+            detail=(
+                "Only image files (e.g., JPEG, PNG) or raw 32x32x3 uint8 RGB bytes "
+                f"({RAW_IMAGE_CONTENT_TYPE}) are allowed for prediction."
+            ),
         )
 
     try:
-        # Read image bytes, preprocess, and make a prediction
-        image_bytes = await file.read()
-        logger.debug(f"Processing image: {file.filename} (size: {len(image_bytes)} bytes)")
-        
-        preprocessed_image = preprocess_image(image_bytes)
-        prediction_result = predict_image(preprocessed_image)
+        # Decode straight from the spooled upload instead of copying it into memory first
+        logger.debug(f"Processing image: {file.filename} (size: {file.size} bytes)")
+
+        preprocessed_image = preprocess_image(file.file, content_type=file.content_type)
+        prediction_result = await predict_image(preprocessed_image)
         
         logger.info(
             f"Prediction successful for {file.filename}: {prediction_result['class_label']}"
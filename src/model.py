@@ -1,10 +1,32 @@
 import numpy as np
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+from typing import BinaryIO, Union
+import array
+import asyncio
 import io
+import logging
 import os
+import queue
+import struct
+import threading
+import time
+
+# Optional libjpeg-turbo fast path for JPEG uploads; falls back to Pillow when unavailable
+try:
+    import cv2
+    import simplejpeg
+except ImportError:
+    cv2 = None
+    simplejpeg = None
+
+# Opt-in BF16 math for oneDNN kernels (AVX-512 BF16 / AMX CPUs); must be set before TensorFlow is imported
+if os.environ.get("USE_BF16", "0") == "1":
+    os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "1")
+    os.environ.setdefault("ONEDNN_DEFAULT_FPMATH_MODE", "BF16")
 
 # Try to import tensorflow first, fall back to keras if not available
 keras_available = False
+tf = None
 try:
     import tensorflow as tf
     keras = tf.keras
@@ -17,10 +39,38 @@ except ImportError:
         keras = None
         keras_available = False
 
+logger = logging.getLogger(__name__)
+
 # Global variable to hold the loaded model
 MODEL = None
+# Inference callable built once at load time: float32 (N, H, W, 3) batch -> class probabilities
+_INFER = None
+# Error messages formatted only when a failure actually happens
+_LOAD_ERROR = "Failed to load model from {}: {}"
+_PREPROCESS_ERROR = "Error processing image: {}"
+_NOT_LOADED_ERROR = "Model is not loaded; call load_model() at startup before predicting"
+# Micro-batching: concurrent predictions are coalesced into a single forward pass
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", "5"))
+# Batches are zero-padded up to one of these sizes (powers of two, capped at MAX_BATCH), so
+# compiled backends only ever see a handful of shapes, all of which are warmed up at load time
+_BATCH_SIZES = tuple(sorted({min(2 ** i, MAX_BATCH) for i in range(MAX_BATCH.bit_length())} | {MAX_BATCH}))
+# Upper bound in seconds on how long a request waits for its batch to be served
+PREDICTION_TIMEOUT = float(os.environ.get("PREDICTION_TIMEOUT", "10"))
+_REQUEST_QUEUE = queue.Queue()
+_BATCH_THREAD = None
+_BATCH_THREAD_LOCK = threading.Lock()
 # Define target image size based on your model's input requirements
 IMAGE_SIZE = (32, 32)  # CIFAR-10 standard size
+_SCALE = np.float32(1.0 / 255.0)  # Keeps pixel normalization in float32
+# Uploads with this content type and exactly H*W*3 bytes are raw uint8 RGB pixels (HWC order)
+RAW_IMAGE_CONTENT_TYPE = "application/octet-stream"
+_RAW_IMAGE_NBYTES = IMAGE_SIZE[0] * IMAGE_SIZE[1] * 3
+_JPEG_MAGIC = b"\xff\xd8\xff"
+# Recycled (1, H, W, 3) float32 input buffers: handed out by preprocess_image and returned
+# by the batch worker once copied into a batch, so requests don't allocate a fresh array each
+_INPUT_SHAPE = (1, IMAGE_SIZE[1], IMAGE_SIZE[0], 3)
+_BUFFER_POOL = queue.SimpleQueue()
 CLASS_LABELS = [
     'airplane', 'automobile', 'bird', 'cat', 'deer',
     'dog', 'frog', 'horse', 'ship', 'truck'
@@ -28,8 +78,8 @@ CLASS_LABELS = [
 
 
 def load_model(model_path: str = None):
-    """Load the pre-trained Keras model once globally."""
-    global MODEL
+    """Load the pre-trained model (Keras .h5, quantized .tflite, .onnx or OpenVINO .xml) once globally."""
+    global MODEL, _INFER
     if MODEL is None:
         # Default model path, can be overridden by environment variable
         effective_model_path = (
@@ -39,41 +89,315 @@ def load_model(model_path: str = None):
         )
         if not os.path.exists(effective_model_path):
             raise FileNotFoundError(f"Model file not found at {effective_model_path}")
-        
-        if not keras_available:
-            raise ImportError(
-                "TensorFlow/Keras not available. "
-                "Please install keras or tensorflow: pip install keras or pip install tensorflow"
-            )
-        
-        try:
-            MODEL = keras.models.load_model(effective_model_path)
-        except Exception as e:
-            raise RuntimeError(f"Failed to load model from {effective_model_path}: {e}")
-    
+
+        _configure_threads()
+        if effective_model_path.endswith(".tflite"):
+            MODEL, _INFER = _load_tflite(effective_model_path)
+        elif effective_model_path.endswith(".onnx"):
+            MODEL, _INFER = _load_onnx(effective_model_path)
+        elif effective_model_path.endswith(".xml"):
+            MODEL, _INFER = _load_openvino(effective_model_path)
+        else:
+            if not keras_available:
+                raise ImportError(
+                    "TensorFlow/Keras not available. "
+                    "Please install keras or tensorflow: pip install keras or pip install tensorflow"
+                )
+
+            try:
+                MODEL = keras.models.load_model(effective_model_path)
+            except (OSError, ValueError, TypeError) as e:
+                raise RuntimeError(_LOAD_ERROR.format(effective_model_path, e))
+            _INFER = _build_keras_infer(MODEL)
+
+        # Warm-up forward passes: graph building, XLA compilation and oneDNN primitive setup
+        # for every padded batch size happen here, not on the first request of each size
+        for batch_size in _BATCH_SIZES:
+            _INFER(np.zeros((batch_size, *_INPUT_SHAPE[1:]), dtype=np.float32))
+
+    _start_batch_worker()
     return MODEL
 
 
-def preprocess_image(image_bytes: bytes) -> np.ndarray:
-    """Preprocess image from bytes to model input format."""
+def _configure_threads():
+    """Use all cores within an op and run ops sequentially (batch inference of one small CNN)."""
+    if tf is None:
+        return
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(os.cpu_count())
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        # The TensorFlow runtime was already initialized; keep its thread pools
+        pass
+
+
+def _load_tflite(model_path: str):
+    """Load a (typically INT8-quantized) TFLite model and return the interpreter and its inference callable."""
+    if tf is None:
+        raise ImportError("TensorFlow is required to serve .tflite models: pip install tensorflow")
+
+    def new_interpreter(batch_size: int):
+        interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=os.cpu_count())
+        interpreter.resize_tensor_input(interpreter.get_input_details()[0]["index"], (batch_size, *_INPUT_SHAPE[1:]))
+        interpreter.allocate_tensors()
+        return interpreter
+
+    try:
+        with open(model_path, "rb") as f:
+            model_content = f.read()
+        # One interpreter per padded batch size, each sized (and its XNNPACK delegate prepared) once,
+        # so the request path never calls resize_tensor_input/allocate_tensors
+        interpreters = {batch_size: new_interpreter(batch_size) for batch_size in _BATCH_SIZES}
+    except (OSError, ValueError, RuntimeError) as e:
+        raise RuntimeError(_LOAD_ERROR.format(model_path, e))
+    interpreter = interpreters[_BATCH_SIZES[0]]
+    input_index = interpreter.get_input_details()[0]["index"]
+    output_index = interpreter.get_output_details()[0]["index"]
+
+    def infer(batch: np.ndarray) -> np.ndarray:
+        # Only the batch worker thread calls this, so the interpreters need no locking
+        if len(batch) not in interpreters:
+            interpreters[len(batch)] = new_interpreter(len(batch))
+        interpreter = interpreters[len(batch)]
+        interpreter.set_tensor(input_index, batch.astype(np.float32, copy=False))
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+
+    return interpreter, infer
+
+
+def _load_onnx(model_path: str):
+    """Load an ONNX model into an ONNX Runtime CPU session and return the session and its inference callable."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ImportError("onnxruntime is required to serve .onnx models: pip install onnxruntime")
+
+    sess_options = ort.SessionOptions()
+    sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    sess_options.intra_op_num_threads = os.cpu_count()
+    sess_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    session = ort.InferenceSession(model_path, sess_options, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+
+    def infer(batch: np.ndarray) -> np.ndarray:
+        return session.run(None, {input_name: batch.astype(np.float32, copy=False)})[0]
+
+    return session, infer
+
+
+def _load_openvino(model_path: str):
+    """Compile an OpenVINO IR model for CPU, caching compiled blobs so restarts skip recompilation."""
+    try:
+        import openvino as ov
+    except ImportError:
+        raise ImportError("OpenVINO is required to serve .xml models: pip install openvino")
+
+    core = ov.Core()
+    core.set_property({"CACHE_DIR": os.environ.get("OV_CACHE_DIR", "/tmp/ov_cache")})
+    compiled_model = core.compile_model(model_path, "CPU", {"PERFORMANCE_HINT": "LATENCY"})
+    # A single infer request is enough: only the batch worker thread runs inference
+    infer_request = compiled_model.create_infer_request()
+
+    def infer(batch: np.ndarray) -> np.ndarray:
+        infer_request.infer({0: batch})
+        # The output tensor is reused by the next inference, so hand out a copy
+        return infer_request.get_output_tensor().data.copy()
+
+    return compiled_model, infer
+
+
+def _build_keras_infer(model):
+    """Trace the model once into a graph instead of going through model.predict()."""
+    if tf is None:
+        # Standalone Keras without TensorFlow: no tf.function available
+        return lambda batch: model.predict(batch, verbose=0)
+
+    # XLA fuses the Conv/BN/ReLU chain into a few kernels; it compiles once per distinct batch size,
+    # which the batch worker limits to _BATCH_SIZES
+    concrete_fn = tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec((None, *IMAGE_SIZE, 3), tf.float32)],
+        jit_compile=True,
+    ).get_concrete_function()
+    return lambda batch: concrete_fn(tf.constant(batch, dtype=tf.float32)).numpy()
+
+
+def _normalize(pixels: np.ndarray) -> np.ndarray:
+    """Scale (height, width, 3) uint8 pixels to [0, 1] in a float32 (1, height, width, 3) batch."""
+    # Fuses the uint8 -> float32 cast, the scaling and the batch dimension into one pass
+    image_array = _acquire_buffer()
+    np.multiply(pixels, _SCALE, out=image_array[0])
+    return image_array
+
+
+def _acquire_buffer() -> np.ndarray:
+    try:
+        return _BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return np.empty(_INPUT_SHAPE, dtype=np.float32)
+
+
+def _release_buffer(image_array: np.ndarray):
+    if image_array.shape == _INPUT_SHAPE and image_array.dtype == np.float32 and image_array.base is None:
+        _BUFFER_POOL.put(image_array)
+
+
+def _decode_jpeg(data: bytes) -> np.ndarray:
+    """Decode a JPEG straight to (height, width, 3) uint8 RGB with libjpeg-turbo, bypassing Pillow."""
+    # min_height/min_width pick the largest DCT downscale (up to 1/8) that still covers the model size
+    pixels = simplejpeg.decode_jpeg(
+        data,
+        colorspace="RGB",
+        fastdct=True,
+        fastupsample=True,
+        min_height=IMAGE_SIZE[1],
+        min_width=IMAGE_SIZE[0],
+    )
+    if pixels.shape[:2] != (IMAGE_SIZE[1], IMAGE_SIZE[0]):
+        pixels = cv2.resize(pixels, IMAGE_SIZE, interpolation=cv2.INTER_AREA)
+    return pixels
+
+
+def preprocess_image(image: Union[bytes, BinaryIO], content_type: str = None) -> np.ndarray:
+    """Preprocess image from bytes or a binary file object to model input format."""
+    if content_type == RAW_IMAGE_CONTENT_TYPE:
+        data = image if isinstance(image, (bytes, bytearray)) else image.read()
+        if len(data) == _RAW_IMAGE_NBYTES:
+            # Already model-sized raw RGB: no decoding at all
+            return _normalize(np.frombuffer(data, dtype=np.uint8).reshape(IMAGE_SIZE[1], IMAGE_SIZE[0], 3))
+        image = data
+    if simplejpeg is not None:
+        if isinstance(image, (bytes, bytearray)):
+            head = image[:3]
+        else:
+            # Peek at the magic bytes only; non-JPEG streams go to Pillow without being read into memory
+            start = image.tell()
+            head = image.read(3)
+            image.seek(start)
+        if head == _JPEG_MAGIC:
+            try:
+                data = image if isinstance(image, (bytes, bytearray)) else image.read()
+                return _normalize(_decode_jpeg(data))
+            except ValueError as e:
+                raise ValueError(_PREPROCESS_ERROR.format(e))
+    if isinstance(image, (bytes, bytearray)):
+        image = io.BytesIO(image)
+    try:
+        image = Image.open(image)
+        # Let JPEG decoding downscale via DCT scaling before the full decode
+        image.draft("RGB", IMAGE_SIZE)
+        image.load()
+        # Already model-sized RGB uploads (typical CIFAR-style inputs) need no conversion
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if image.size != IMAGE_SIZE:
+            image = image.resize(IMAGE_SIZE, Image.BILINEAR)
+        return _normalize(np.asarray(image, dtype=np.uint8))
+    # Pillow's format plugins also signal damaged files with SyntaxError (e.g. "broken PNG file"),
+    # struct.error, EOFError and IndexError
+    except (
+        UnidentifiedImageError,
+        Image.DecompressionBombError,
+        OSError,
+        ValueError,
+        SyntaxError,
+        struct.error,
+        EOFError,
+        IndexError,
+    ) as e:
+        raise ValueError(_PREPROCESS_ERROR.format(e))
+
+
+def _start_batch_worker():
+    """Start the background thread that serves queued predictions (idempotent; restarts a dead thread)."""
+    global _BATCH_THREAD
+    with _BATCH_THREAD_LOCK:
+        if _BATCH_THREAD is None or not _BATCH_THREAD.is_alive():
+            _BATCH_THREAD = threading.Thread(target=_batch_worker, name="predict-batcher", daemon=True)
+            _BATCH_THREAD.start()
+
+
+def _resolve(future: asyncio.Future, result=None, error: Exception = None):
+    # Runs on the request's event loop; the request may have been cancelled meanwhile
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _deliver(loop: asyncio.AbstractEventLoop, future: asyncio.Future, result=None, error: Exception = None):
     try:
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        image = image.resize(IMAGE_SIZE)
-        image_array = np.array(image) / 255.0  # Normalize pixel values to [0, 1]
-        # Add batch dimension (batch_size, height, width, channels)
-        image_array = np.expand_dims(image_array, axis=0)
-        return image_array
-    except Exception as e:
-        raise ValueError(f"Error processing image: {e}")
-
-
-def predict_image(preprocessed_image: np.ndarray):
-    """Make a prediction on preprocessed image."""
-    model = load_model()  # Ensure model is loaded
-    predictions = model.predict(preprocessed_image, verbose=0)
+        loop.call_soon_threadsafe(_resolve, future, result, error)
+    except RuntimeError:
+        # The request's event loop is closed, so nobody is waiting for this result any more
+        pass
+
+
+def _padded_batch_size(n: int) -> int:
+    return next((size for size in _BATCH_SIZES if size >= n), n)
+
+
+def _batch_worker():
+    """Drain up to MAX_BATCH queued images (waiting at most MAX_WAIT_MS) and run them as one batch."""
+    batch_buffer = np.zeros((_BATCH_SIZES[-1], *_INPUT_SHAPE[1:]), dtype=np.float32)
+    while True:
+        items = [_REQUEST_QUEUE.get()]
+        deadline = time.monotonic() + MAX_WAIT_MS / 1000
+        while len(items) < MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                items.append(_REQUEST_QUEUE.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        # Any failure is reported to the batch's requests; it must never kill the thread
+        try:
+            n = len(items)
+            batch_size = _padded_batch_size(n)
+            if batch_size > len(batch_buffer):
+                batch_buffer = np.zeros((batch_size, *_INPUT_SHAPE[1:]), dtype=np.float32)
+            batch = batch_buffer[:batch_size]
+            # Padding rows keep whatever earlier batches left there; their predictions are dropped
+            np.concatenate([image for image, _, _ in items], axis=0, out=batch[:n])
+            for image, _, _ in items:
+                _release_buffer(image)
+            predictions = _INFER(batch)[:n]
+            if len(predictions) != len(items):
+                raise ValueError(f"Model returned {len(predictions)} predictions for a batch of {len(items)}")
+        except Exception as e:
+            logger.error(f"Batch inference failed: {e}")
+            for _, loop, future in items:
+                _deliver(loop, future, None, e)
+            continue
+        for i, (_, loop, future) in enumerate(items):
+            _deliver(loop, future, predictions[i])
+
+
+async def predict_image(preprocessed_image: np.ndarray):
+    """Make a prediction on preprocessed image, batched with other concurrent requests.
+
+    Takes ownership of preprocessed_image: its buffer is reused for later requests once batched.
+    The model must already be loaded (the API does this at startup); nothing is loaded lazily here.
+    Raises asyncio.TimeoutError if the batch isn't served within PREDICTION_TIMEOUT seconds.
+    """
+    if _BATCH_THREAD is None:
+        raise RuntimeError(_NOT_LOADED_ERROR)
+    if not _BATCH_THREAD.is_alive():
+        logger.warning("Prediction batch worker is not running; restarting it")
+        _start_batch_worker()
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _REQUEST_QUEUE.put((preprocessed_image, loop, future))
+    predictions = await asyncio.wait_for(future, PREDICTION_TIMEOUT)
     # Convert raw predictions (e.g., softmax outputs) into meaningful class labels and probabilities
-    predicted_class_idx = np.argmax(predictions, axis=1)[0]
-    probabilities = predictions[0].tolist()  # Convert numpy array to list for JSON serialization
+    predicted_class_idx = int(predictions.argmax())
+    # Compact float32 sequence copied from the raw buffer; no per-element Python floats until serialization
+    probabilities = array.array("f", predictions.astype(np.float32, copy=False).tobytes())
 
     return {
         "class_label": CLASS_LABELS[predicted_class_idx],
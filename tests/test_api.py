@@ -62,7 +62,7 @@ def test_predict_invalid_file_type_handling():
     )
     # Assert that the API correctly rejects invalid file types with a 400 status
     assert response.status_code == 400
-    assert "Only image files (e.g., JPEG, PNG) are allowed for prediction." in response.json()["detail"]
+    assert "Only image files (e.g., JPEG, PNG) or raw 32x32x3 uint8 RGB bytes" in response.json()["detail"]
 
 
 def test_predict_missing_file_upload():
@@ -103,6 +103,28 @@ def test_predict_with_jpg_image(mock_preprocess_image, mock_predict_image):
     assert response_data["class_label"] == "cat"
 
 
+@patch('src.main.predict_image')
+@patch('src.main.preprocess_image')
+def test_predict_with_raw_rgb_bytes(mock_preprocess_image, mock_predict_image):
+    """Test prediction with raw 32x32x3 RGB bytes sent as application/octet-stream."""
+    mock_preprocess_image.return_value = np.zeros((1, 32, 32, 3), dtype=np.float32)
+    mock_predict_image.return_value = {
+        "class_label": "ship",
+        "probabilities": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+    }
+
+    response = client.post(
+        "/predict",
+        files={
+            "file": ("pixels.bin", bytes(32 * 32 * 3), "application/octet-stream")
+        }
+    )
+
+    assert response.status_code == 200
+    assert response.json()["class_label"] == "ship"
+    assert mock_preprocess_image.call_args.kwargs["content_type"] == "application/octet-stream"
+
+
 @patch('src.main.preprocess_image')
 def test_predict_with_corrupted_image(mock_preprocess_image):
     """Test behavior when a corrupted image is sent."""
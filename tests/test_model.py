@@ -0,0 +1,193 @@
+import asyncio
+import io
+import struct
+import zlib
+from PIL import Image
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from src import model
+from src.model import preprocess_image, IMAGE_SIZE
+
+
+def _encode_image(size, fmt='PNG', color='blue'):
+    """Encode a solid-color image in the given format."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=color).save(buffer, format=fmt)
+    buffer.seek(0)
+    return buffer
+
+
+def _serve(monkeypatch, infer):
+    """Install a fake inference callable as if load_model() had run at startup."""
+    monkeypatch.setattr(model, 'MODEL', object())
+    monkeypatch.setattr(model, '_INFER', infer)
+    model._start_batch_worker()
+
+
+def test_preprocess_image_from_bytes():
+    """Test preprocessing raw encoded bytes into a normalized batch of one."""
+    image_array = preprocess_image(_encode_image((64, 64)).getvalue())
+
+    assert image_array.shape == (1, IMAGE_SIZE[0], IMAGE_SIZE[1], 3)
+    assert image_array.dtype == np.float32
+    assert image_array.min() >= 0.0 and image_array.max() <= 1.0
+    np.testing.assert_allclose(image_array[0, 0, 0], [0.0, 0.0, 1.0])
+
+
+def test_preprocess_image_from_file_object():
+    """Test preprocessing directly from a file-like upload stream (e.g. a large JPEG)."""
+    image_array = preprocess_image(_encode_image((640, 480), fmt='JPEG', color='red'))
+
+    assert image_array.shape == (1, IMAGE_SIZE[0], IMAGE_SIZE[1], 3)
+    np.testing.assert_allclose(image_array[0, 16, 16], [1.0, 0.0, 0.0], atol=0.02)
+
+
+def test_predict_image_uses_compiled_inference(monkeypatch):
+    """Test that predictions come from the inference callable built at load time."""
+    probabilities = np.array([[0.0, 0.0, 0.1, 0.7, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0]], dtype=np.float32)
+    _serve(monkeypatch, lambda batch: probabilities)
+
+    result = asyncio.run(model.predict_image(np.zeros((1, 32, 32, 3), dtype=np.float32)))
+
+    assert result["class_label"] == "cat"
+    np.testing.assert_allclose(result["probabilities"], probabilities[0])
+
+
+def test_predict_image_requires_loaded_model(monkeypatch):
+    """Test that predicting before load_model() fails fast instead of loading on the request path."""
+    monkeypatch.setattr(model, '_BATCH_THREAD', None)
+    load_model = MagicMock()
+    monkeypatch.setattr(model, 'load_model', load_model)
+
+    with pytest.raises(RuntimeError, match="not loaded"):
+        asyncio.run(model.predict_image(np.zeros((1, 32, 32, 3), dtype=np.float32)))
+    load_model.assert_not_called()
+
+
+def test_predict_image_batches_concurrent_requests(monkeypatch):
+    """Test that concurrent predictions share one padded forward pass and get their own rows back."""
+    batch_sizes = []
+
+    def fake_infer(batch):
+        batch_sizes.append(len(batch))
+        # One-hot on the class index encoded in each image's first pixel
+        return np.eye(10, dtype=np.float32)[batch[:, 0, 0, 0].astype(int)]
+
+    _serve(monkeypatch, fake_infer)
+    monkeypatch.setattr(model, 'MAX_WAIT_MS', 50)
+
+    async def predict_all():
+        images = [np.full((1, 32, 32, 3), i, dtype=np.float32) for i in range(5)]
+        return await asyncio.gather(*(model.predict_image(image) for image in images))
+
+    results = asyncio.run(predict_all())
+
+    assert [r["class_label"] for r in results] == model.CLASS_LABELS[:5]
+    assert batch_sizes == [8]
+
+
+def test_batch_worker_survives_failed_batches(monkeypatch):
+    """Test that a bad backend result or a closed caller loop fails only that batch, not the worker thread."""
+    short = {'by': 1}
+    _serve(monkeypatch, lambda batch: np.full((len(batch) - short['by'], 10), 0.1, dtype=np.float32))
+    image = np.zeros((1, 32, 32, 3), dtype=np.float32)
+
+    # Backend returns fewer rows than the batch
+    with pytest.raises(ValueError, match="predictions for a batch of 1"):
+        asyncio.run(model.predict_image(image.copy()))
+
+    # Caller's event loop closes before the result is delivered
+    short['by'] = 0
+    closed_loop = asyncio.new_event_loop()
+    model._REQUEST_QUEUE.put((image.copy(), closed_loop, closed_loop.create_future()))
+    closed_loop.close()
+
+    result = asyncio.run(model.predict_image(image.copy()))
+
+    assert len(result["probabilities"]) == 10
+    assert model._BATCH_THREAD.is_alive()
+
+
+def test_batch_sizes_are_padded_to_fixed_shapes():
+    """Test that batches only ever run at a few warmed-up sizes, capped at MAX_BATCH."""
+    assert model._BATCH_SIZES[0] == 1 and model._BATCH_SIZES[-1] == model.MAX_BATCH
+    assert [model._padded_batch_size(n) for n in (1, 2, 3, 5, 9)] == [1, 2, 4, 8, 16]
+    assert model._padded_batch_size(model.MAX_BATCH) == model.MAX_BATCH
+
+
+def test_preprocess_image_model_sized_input_is_unchanged():
+    """Test that a 32x32 RGB upload is only normalized, without resampling."""
+    pixels = np.random.randint(0, 256, size=(IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+
+    image_array = preprocess_image(buffer.getvalue())
+
+    np.testing.assert_allclose(image_array[0], pixels / 255.0, rtol=1e-6)
+
+
+def test_preprocess_image_rejects_corrupted_data():
+    """Test that undecodable uploads surface as ValueError for the API's 422 handling."""
+    with pytest.raises(ValueError, match="Error processing image"):
+        preprocess_image(b"This is corrupted data")
+
+
+def test_preprocess_image_rejects_corrupted_png_chunk():
+    """Test that a PNG with a damaged chunk (Pillow raises SyntaxError) also surfaces as ValueError."""
+    png = _encode_image((40, 40)).getvalue()
+    # Signature and IHDR take 33 bytes; split the IDAT data and give its second half an invalid chunk type
+    (length,) = struct.unpack('>I', png[33:37])
+    data = png[41:41 + length]
+
+    def chunk(chunk_type, payload):
+        return struct.pack('>I', len(payload)) + chunk_type + payload + struct.pack('>I', zlib.crc32(chunk_type + payload))
+
+    corrupted = png[:33] + chunk(b'IDAT', data[:length // 2]) + chunk(b'\x00\x01\x02\x03', data[length // 2:]) + png[45 + length:]
+
+    with pytest.raises(ValueError, match="Error processing image"):
+        preprocess_image(corrupted)
+
+
+def test_preprocess_image_raw_rgb_bytes():
+    """Test that raw 32x32x3 uint8 uploads skip decoding and are only normalized."""
+    pixels = np.random.randint(0, 256, size=(IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.uint8)
+
+    image_array = preprocess_image(io.BytesIO(pixels.tobytes()), content_type=model.RAW_IMAGE_CONTENT_TYPE)
+
+    assert image_array.shape == (1, IMAGE_SIZE[1], IMAGE_SIZE[0], 3)
+    np.testing.assert_allclose(image_array[0], pixels / 255.0, rtol=1e-6)
+
+
+def test_preprocess_image_fast_jpeg_path(monkeypatch):
+    """Test that JPEG uploads decode through simplejpeg/OpenCV when available, matching the Pillow path,
+    while other formats are still decoded by Pillow from the stream."""
+    pytest.importorskip('simplejpeg')
+    pytest.importorskip('cv2')
+    decoded = []
+    decode_jpeg = model._decode_jpeg
+    monkeypatch.setattr(model, '_decode_jpeg', lambda data: decoded.append(data) or decode_jpeg(data))
+
+    image_array = preprocess_image(_encode_image((640, 480), fmt='JPEG', color='red'))
+
+    assert len(decoded) == 1
+    assert image_array.shape == (1, IMAGE_SIZE[0], IMAGE_SIZE[1], 3)
+    np.testing.assert_allclose(image_array[0, 16, 16], [1.0, 0.0, 0.0], atol=0.02)
+
+    decoded.clear()
+    image_array = preprocess_image(_encode_image((64, 64), fmt='PNG'))
+
+    assert decoded == []
+    np.testing.assert_allclose(image_array[0, 0, 0], [0.0, 0.0, 1.0])
+
+
+def test_preprocess_buffers_are_recycled_after_prediction(monkeypatch):
+    """Test that an input buffer returns to the pool once its batch has been copied."""
+    _serve(monkeypatch, lambda batch: np.full((len(batch), 10), 0.1, dtype=np.float32))
+    monkeypatch.setattr(model, '_BUFFER_POOL', model.queue.SimpleQueue())
+
+    first = preprocess_image(_encode_image((32, 32)).getvalue())
+    asyncio.run(model.predict_image(first))
+    second = preprocess_image(_encode_image((32, 32), color='red').getvalue())
+
+    assert second is first